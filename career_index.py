@@ -0,0 +1,170 @@
+from season_data import all_season_keys
+from player_search import player_index
+from fetch_governor import PREFETCH, upstream_unavailable
+from metrics import metrics
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import threading
+import time
+
+# stat columns that are added up across seasons
+STAT_COLUMNS = ['PTS', 'AST', 'REB', 'STL', 'BLK']
+
+# Class: career_index
+# Purpose: Follow each player across every loaded season to answer career totals, averages, best seasons, and changes between seasons
+class career_index:
+    # Function: __init__()
+    # Purpose: Initialize an empty career index on top of the season cache
+    # Precondition: A season_cache must be provided; max_workers is how many seasons are fetched at the same time
+    # Postcondition: Sets up the career index, the seasons are only loaded when the first career query comes in
+    def __init__(self, seasons, max_workers = 8):
+        self.seasons = seasons
+        self.max_workers = max_workers
+        self.season_dfs = None # (season_id, season_type) -> stats DataFrame of the season cache (read from shared memory when the server runs several workers, so it is not copied)
+        self.players = {} # player ID -> list of (season_id, season_type, season's DataFrame, row in it)
+        self.player_ids = {} # player name -> IDs of the players with that name (different players can share a name)
+        self.player_names = {} # player ID -> player name
+        self.name_index = None
+        self.missing_seasons = [] # (season_id, season_type) that failed to load in the last build, tried again on the next query
+        self.built_at = 0
+        self.lock = threading.Lock()
+
+    # Function: load_season()
+    # Purpose: Load one season from the season cache for the career index
+    # Precondition: A season ID and season type must be provided
+    # Postcondition: Returns the season's stats DataFrame, or None if the season could not be loaded
+    def load_season(self, season_id, season_type):
+        try:
+            stats_df, name_index = self.seasons.get_season(season_id, season_type, PREFETCH) # client requests for one season go first
+        except Exception:
+            return None # skip the season, it will be tried again the next time the index is built
+        finally:
+            metrics.add_gauge('career_loads_queued', -1)
+
+        return stats_df
+
+    # Function: build()
+    # Purpose: Load all seasons at the same time and index the rows of every player
+    # Precondition: None
+    # Postcondition: Fills season_dfs, players, and name_index; already cached seasons are not fetched again
+    def build(self):
+        season_keys = all_season_keys()
+        metrics.add_gauge('career_loads_queued', len(season_keys)) # seasons waiting for or being loaded by the executor
+
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            season_dfs = list(executor.map(lambda key: self.load_season(*key), season_keys))
+
+        # remember the seasons that failed so the index is not treated as complete
+        missing_seasons = [key for key, season_df in zip(season_keys, season_dfs) if season_df is None]
+        if missing_seasons:
+            metrics.increment('career_seasons_missing', len(missing_seasons))
+
+        # keep the season DataFrames as they are instead of concatenating them into a copy
+        season_dfs = {key: season_df for key, season_df in zip(season_keys, season_dfs) if season_df is not None and not season_df.empty}
+        if not season_dfs:
+            raise upstream_unavailable("No season could be loaded for the career index")
+
+        # group the rows of each player by ID (player ID -> list of (season, type, DataFrame, row)) so players with the same name are kept apart
+        players = {}
+        player_ids = {}
+        player_names = {}
+        for (season_id, season_type), season_df in season_dfs.items():
+            for row, (player_id, player_name) in enumerate(zip(season_df['PLAYER_ID'].tolist(), season_df['PLAYER_NAME'])):
+                if player_id not in players:
+                    player_ids.setdefault(player_name, []).append(player_id)
+                    player_names[player_id] = player_name
+                players.setdefault(player_id, []).append((season_id, season_type, season_df, row))
+
+        self.season_dfs = season_dfs
+        self.players = players
+        self.player_ids = player_ids
+        self.player_names = player_names
+        self.name_index = player_index(list(player_ids))
+        self.missing_seasons = missing_seasons
+        self.built_at = time.time()
+
+    # Function: ensure_built()
+    # Purpose: Build the career index on first use, and rebuild it when the current season's data is refreshed or some seasons failed to load
+    # Precondition: None
+    # Postcondition: The career index is ready to be queried (missing_seasons lists the seasons that still could not be loaded)
+    def ensure_built(self):
+        if not self.needs_build():
+            return
+
+        with self.lock:
+            # another thread may have built it while this one was waiting
+            if self.needs_build():
+                self.build()
+
+    # Function: needs_build()
+    # Purpose: Check if the career index has to be built again
+    # Precondition: None
+    # Postcondition: Returns True if the index was never built, is older than refresh_seconds, or is missing seasons
+    def needs_build(self):
+        return self.season_dfs is None or bool(self.missing_seasons) or time.time() - self.built_at >= self.seasons.refresh_seconds
+
+    # Function: find_players()
+    # Purpose: Find the IDs of the players matching a name or a player ID
+    # Precondition: A player name or player ID must be provided as a string
+    # Postcondition: Returns the list of matching player IDs (several if different players share the name, empty if there is none)
+    def find_players(self, player_name):
+        self.ensure_built()
+
+        try:
+            player_id = int(player_name)
+        except ValueError:
+            return list(self.player_ids.get(player_name, []))
+
+        return [player_id] if player_id in self.players else []
+
+    # Function: describe_player()
+    # Purpose: Describe a player by name, ID, and first and last season, used when several players share a name
+    # Precondition: A player ID from find_players() must be provided
+    # Postcondition: Returns a short description (e.g., 'Tony Mitchell (ID 203183), 2013-14 to 2013-14')
+    def describe_player(self, player_id):
+        season_ids = sorted(season_id for season_id, season_type, season_df, row in self.players[player_id])
+        return f"{self.player_names[player_id]} (ID {player_id}), {season_ids[0]} to {season_ids[-1]}"
+
+    # Function: get_player_seasons()
+    # Purpose: Get the seasons of a player for one season type, sorted from the oldest season
+    # Precondition: A player ID from find_players() and a season type must be provided
+    # Postcondition: Returns a DataFrame with one row per season, it is empty if the player has no seasons of that type
+    def get_player_seasons(self, player_id, season_type):
+        self.ensure_built()
+
+        # read the player's row of each season (only these few values are copied)
+        rows = sorted(((season_id, season_df, row) for season_id, row_type, season_df, row in self.players.get(player_id, []) if row_type == season_type), key = lambda season: season[0])
+
+        columns = {column: [season_df[column].iat[row] for season_id, season_df, row in rows] for column in ['GP'] + STAT_COLUMNS}
+        return pd.DataFrame(columns, index = pd.Index([season_id for season_id, season_df, row in rows], name = 'SEASON_ID'))
+
+    # Function: career_totals()
+    # Purpose: Estimate a player's stats added up over the whole career
+    # Precondition: A DataFrame from get_player_seasons() must be provided
+    # Postcondition: Returns a Series with the career games played and estimated total of each stat
+    def career_totals(self, player_df):
+        # the season stats are per game averages rounded to 0.1, so multiplying by the games played only estimates the real totals
+        totals = player_df[STAT_COLUMNS].mul(player_df['GP'], axis = 0).sum()
+        return pd.concat([pd.Series({'GP': player_df['GP'].sum()}), totals]).round().astype(int)
+
+    # Function: career_averages()
+    # Purpose: Estimate a player's per game averages over the whole career
+    # Precondition: A DataFrame from get_player_seasons() must be provided
+    # Postcondition: Returns a Series with the estimated career per game average of each stat (weighted by games played)
+    def career_averages(self, player_df):
+        totals = player_df[STAT_COLUMNS].mul(player_df['GP'], axis = 0).sum()
+        return (totals / player_df['GP'].sum()).round(1)
+
+    # Function: best_seasons()
+    # Purpose: Find the season where the player had the highest value of each stat
+    # Precondition: A DataFrame from get_player_seasons() must be provided
+    # Postcondition: Returns a DataFrame with the best season and its value for each stat
+    def best_seasons(self, player_df):
+        return pd.DataFrame({'SEASON_ID': player_df[STAT_COLUMNS].idxmax(), 'VALUE': player_df[STAT_COLUMNS].max()})
+
+    # Function: season_changes()
+    # Purpose: Compute how much each stat went up or down compared to the season before
+    # Precondition: A DataFrame from get_player_seasons() must be provided
+    # Postcondition: Returns a DataFrame of the change for each season after the first one
+    def season_changes(self, player_df):
+        return player_df[STAT_COLUMNS].diff().iloc[1:].round(1)
@@ -15,6 +15,9 @@ def display_menu():
     print("4. View Team Rankings")
     print("5. Add New Record")
     print("6. Exit")
+    print("7. View Career Stats")
+    print("8. View Server Metrics")
+    print("9. Follow Live Games")
     print("====================================\n")
 
 def main():
@@ -35,7 +38,7 @@ def main():
 
     while True:
         display_menu() # display options for the user
-        choice = input("Enter your choice (1-6): ")
+        choice = input("Enter your choice (1-9): ")
 
         # send the choice to the server 
         client_socket.send(choice.encode())  
@@ -187,9 +190,10 @@ def main():
                 print("What kind of record would you like to add?")
                 print("1. Add Player Stats")
                 print("2. Cancel")
+                print("3. Profile Server")
 
                 # get the user input choice and send it to the server
-                record_choice = input("Enter your choice (1-2): ")
+                record_choice = input("Enter your choice (1-3): ")
                 client_socket.send(record_choice.encode())
 
 
@@ -212,8 +216,96 @@ def main():
 
                     break # exit the loop
 
+                elif record_choice == '3': # profile server
+                    # ask how long to profile and send it to the server
+                    seconds = input("Enter the number of seconds to profile (1-300): ")
+                    client_socket.send(seconds.encode())
+
+                    # receive message from the server and display it
+                    response = client_socket.recv(8000).decode()
+                    print(f"\n=== Message from server ===\n{response}\n")
+
+                else:
+                    print("\nInvalid choice, select between 1 and 3.\n")
+
+        elif choice == "7": # View Career Stats
+            print("\nYou selected: View Career Stats")
+
+            # get the season type and player name and send them to the server
+            season_type = get_season_type()
+            player_name = input("Enter the player's full name (First Last): ")
+            client_socket.send(f"{season_type},{player_name}".encode())
+
+            while True:
+                # receive and print the response from the server (the first request loads every season, so it can take a while)
+                response = client_socket.recv(8000).decode()
+                print(f"\n=== Message from server ===\n{response}\n")
+
+                # check for error, or several players with the same name
+                if "No stats found" in response:
+                    player_name = input("Enter the player's full name (First Last): ")
+                    client_socket.send(f"{season_type},{player_name}".encode())
+                elif "Several players are named" in response:
+                    player_id = input("Enter the player ID: ")
+                    client_socket.send(f"{season_type},{player_id}".encode())
                 else:
-                    print("\nInvalid choice, select between 1 and 2.\n")
+                    break # exit the loop if successful
+
+        elif choice == "8": # View Server Metrics
+            print("\nYou selected: View Server Metrics")
+
+            # receive and display the metrics from the server
+            response = client_socket.recv(8000).decode()
+            print(f"\n=== Message from server ===\n{response}\n")
+
+        elif choice == "9": # Follow Live Games
+            print("\nYou selected: Follow Live Games")
+
+            # get the game date and how long to follow it and send them to the server
+            game_date = input("Enter the game date in YYYYMMDD format: ")
+            minutes = input("Enter how many minutes to follow the games (1-240): ")
+            client_socket.send(f"{game_date},{minutes}".encode())
+
+            while True:
+                # receive the message from the server and display it (the first score updates may arrive in the same recv, after the first line)
+                response = client_socket.recv(8000)
+                message, _, buffer = response.partition(b"\n")
+                response = message.decode()
+                print(f"\n=== Message from server ===\n{response}\n")
+
+                # check for error
+                if "Check the date format" in response or "Invalid" in response:
+                    # ask and send the date and minutes again
+                    game_date = input("Enter the game date in YYYYMMDD format: ")
+                    minutes = input("Enter how many minutes to follow the games (1-240): ")
+                    client_socket.send(f"{game_date},{minutes}".encode())
+                else:
+                    break # exit the loop if successful
+
+            # print the score changes one line at a time until the server ends the subscription or closes the connection
+            server_closed = False
+            while True:
+                lines = buffer.split(b"\n")
+                buffer = lines.pop() # a line split between two recv calls is completed by the next one
+
+                if b"Subscription ended" in lines:
+                    for line in lines[:lines.index(b"Subscription ended")]:
+                        print(line.decode())
+                    break
+
+                for line in lines:
+                    print(line.decode())
+
+                data = client_socket.recv(8000)
+                if not data:
+                    server_closed = True
+                    break
+                buffer += data
+            print()
+
+            if server_closed:
+                print("The server closed the connection.")
+                break # exit the main loop
 
         elif choice == "6": # Exit
             # recieve message from server and display it 
@@ -1,17 +1,48 @@
 import requests
 import pandas as pd
 from datetime import datetime
+from metrics import metrics
+from fetch_governor import fetch_governor, INTERACTIVE
+
+# Function: request_json()
+# Purpose: Send a GET request to an API and parse the JSON response, timing both steps
+# Precondition: A valid URL must be provided; headers are optional
+# Postcondition: Returns the parsed JSON response; upstream errors (including error status codes and timeouts) are counted before they are raised again
+def request_json(url, headers = None):
+    try:
+        with metrics.time_stage('upstream_http'):
+            response = requests.get(url = url, headers = headers, timeout = 15)
+            response.raise_for_status()
+
+        with metrics.time_stage('json_parse'):
+            return response.json()
+
+    except (requests.RequestException, ValueError):
+        metrics.increment('upstream_errors')
+        raise
+
+# every request of the fetch classes goes through the governor (stats.nba.com throttles, so it gets 2 requests per second)
+governor = fetch_governor(request_json, host_rates = {'stats.nba.com': (2, 4), 'api.foxsports.com': (10, 20)})
+
+# Function: get_json()
+# Purpose: Get the JSON response of a URL through the fetch governor
+# Precondition: A valid URL must be provided; headers, priority (INTERACTIVE/PREFETCH), and keep_fallback (keep the response for when the API fails) are optional
+# Postcondition: Returns the parsed JSON response (identical requests sent at the same time share one request)
+def get_json(url, headers = None, priority = INTERACTIVE, keep_fallback = True):
+    return governor.get_json(url, headers, priority, keep_fallback)
 
 # Class: nba_stats
 # Purpose: Fetch and process NBA player statistics for a given season and season type
 class nba_stats:
     # Function: __init__()
     # Purpose: Initialize the nba stats class with the specified season ID and season type
-    # Precondition: Valid season ID and season type must be provided (default: 2024-25 Regular Season)
+    # Precondition: Valid season ID and season type must be provided (default: 2024-25 Regular Season); priority is INTERACTIVE or PREFETCH; keep_fallback is True only for a season that can still change
     # Postcondition: Sets up the URL and request headers required to fetch NBA player statistics
-    def __init__(self, season_id='2024-25', season_type='Regular%20Season'):
+    def __init__(self, season_id='2024-25', season_type='Regular%20Season', priority = INTERACTIVE, keep_fallback = False):
         self.season_id = season_id
         self.season_type = season_type
+        self.priority = priority
+        self.keep_fallback = keep_fallback
         self.info_url = f'https://stats.nba.com/stats/leaguedashplayerstats?College=&Conference=&Country=&DateFrom=&DateTo=&Division=&DraftPick=&DraftYear=&GameScope=&GameSegment=&Height=&ISTRound=&LastNGames=0&LeagueID=00&Location=&MeasureType=Base&Month=0&OpponentTeamID=0&Outcome=&PORound=0&PaceAdjust=N&PerMode=PerGame&Period=0&PlayerExperience=&PlayerPosition=&PlusMinus=N&Rank=N&Season={season_id}&SeasonSegment=&SeasonType={season_type}&ShotClockRange=&StarterBench=&TeamID=0&VsConference=&VsDivision=&Weight='
 
         self.headers = {
@@ -24,24 +55,26 @@ class nba_stats:
     # Precondition: The URL and headers must be correctly configured
     # Postcondition: Returns the JSON response containing player statistics
     def fetch_data(self):
-        response = requests.get(url = self.info_url, headers = self.headers).json()
+        response = get_json(self.info_url, self.headers, self.priority, self.keep_fallback)
         return response
     
     # Function: get_stats()
     # Purpose: Extract and format key player statistics into a pandas DataFrame
     # Precondition: Data must be fetched successfully using fetch_data()
-    # Postcondition: Returns a DataFrame with selected columns (e.g., PLAYER_NAME, AST, REB, PTS)
-    def get_stats(self):
+    # Postcondition: Returns a DataFrame with selected columns (e.g., PLAYER_NAME, AST, REB, PTS), or the given columns_list
+    def get_stats(self, columns_list = None):
         data = self.fetch_data()
 
         # match column names from the NBA API
-        columns_list = ['PLAYER_NAME', 'AST', 'REB', 'STL', 'BLK', 'PTS']
+        if columns_list is None:
+            columns_list = ['PLAYER_NAME', 'AST', 'REB', 'STL', 'BLK', 'PTS']
 
         player_info = data['resultSets'][0]['rowSet']
 
-        df = pd.DataFrame(player_info, columns = data['resultSets'][0]['headers'])
+        with metrics.time_stage('dataframe'):
+            df = pd.DataFrame(player_info, columns = data['resultSets'][0]['headers'])
 
-        return df[columns_list]
+            return df[columns_list]
 
 # Class: nba_ranking
 # Purpose: Retrieve and display team rankings for the NBA regular season
@@ -64,7 +97,7 @@ class nba_ranking:
     # Precondition: The URL and headers must be correctly configured
     # Postcondition: Returns the JSON response containing team rankings data
     def fetch_data(self):
-        response = requests.get(url = self.info_url, headers = self.headers).json()
+        response = get_json(self.info_url, self.headers)
         return response
     
     # Function: get_ranking()
@@ -79,9 +112,10 @@ class nba_ranking:
 
         team_info = data['resultSets'][0]['rowSet'] # get the data
 
-        df = pd.DataFrame(team_info, columns = data['resultSets'][0]['headers'])
+        with metrics.time_stage('dataframe'):
+            df = pd.DataFrame(team_info, columns = data['resultSets'][0]['headers'])
 
-        return df[columns_list]
+            return df[columns_list]
     
 
 # Class: nba_scoreboard
@@ -108,7 +142,7 @@ class nba_scoreboard:
     # Precondition: The URL and headers must be correctly configured
     # Postcondition: Returns the JSON response containing scoreboard data
     def fetch_data(self):
-        response = requests.get(url = self.info_url).json()
+        response = get_json(self.info_url)
         return response
     
     # Function: get_event_detail()
@@ -118,6 +152,27 @@ class nba_scoreboard:
     def get_event_detail(self, event, key, default_value = 'Not available'):
         return event.get(key, default_value)
 
+    # Function: get_game_states()
+    # Purpose: Get the status and score of every game on the given date, used to find what changed between two polls
+    # Precondition: Data must be fetched successfully using fetch_data()
+    # Postcondition: Returns a dictionary of 'home team vs away team' -> (status, home score, away score)
+    def get_game_states(self):
+        data = self.fetch_data()
+
+        # no section means there are no games on that date
+        if not data.get('sectionList'):
+            return {}
+
+        game_states = {}
+        for event in data['sectionList'][0]['events']:
+            home_team = event['upperTeam']['longName']
+            away_team = event['lowerTeam']['longName']
+            game_status = self.get_event_detail(event, 'statusLine')
+
+            game_states[f'{home_team} vs {away_team}'] = (game_status, event['upperTeam'].get('score', '-'), event['lowerTeam'].get('score', '-'))
+
+        return game_states
+
     # Function: extract_scoreboard_info()
     # Purpose: Extract and format detailed information about games played on the given date
     # Precondition: Data must be fetched successfully using fetch_data()
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from urllib.parse import urlparse
+from metrics import metrics
+import contextlib
+import itertools
+import threading
+import time
+
+# request priorities, a lower number goes first
+INTERACTIVE = 0 # a client is waiting for the answer
+PREFETCH = 1 # bulk loading (e.g., every season for the career index)
+
+# Class: upstream_unavailable
+# Purpose: Error raised when an API keeps failing and there is no cached response to fall back on
+class upstream_unavailable(Exception):
+    pass
+
+# Class: host_state
+# Purpose: Hold the token bucket (requests per second, with short bursts) and the circuit breaker of one host, in shared memory when the server runs several worker processes
+class host_state:
+    # Function: __init__()
+    # Purpose: Initialize a full token bucket and a closed circuit breaker
+    # Precondition: rate is the number of requests allowed per second and burst the max number of requests sent at once; context is a multiprocessing context to share the state between worker processes (None for one process)
+    # Postcondition: Sets up the state with burst tokens
+    def __init__(self, rate, burst, context = None):
+        self.rate = rate
+        self.burst = burst
+
+        # tokens, last time tokens were added, failures in a row, time until the circuit breaker is open
+        values = [burst, time.monotonic(), 0, 0]
+
+        if context is None:
+            self.values = values
+            self.lock = contextlib.nullcontext() # the governor's condition already protects it
+        else:
+            self.values = context.Array('d', values)
+            self.lock = self.values.get_lock() # the workers share the rate limit and the failures of the host
+
+    # Function: take()
+    # Purpose: Take a token if one is available
+    # Precondition: None
+    # Postcondition: Returns 0 if a token was taken; otherwise, the number of seconds until the next token
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self.values[0] + (now - self.values[1]) * self.rate)
+            self.values[1] = now
+
+            if tokens >= 1:
+                self.values[0] = tokens - 1
+                return 0
+
+            self.values[0] = tokens
+            return (1 - tokens) / self.rate
+
+    # Function: is_open()
+    # Purpose: Check if the circuit breaker is open (requests to the host are not sent)
+    # Precondition: None
+    # Postcondition: Returns True while the host is cooling down after too many failures
+    def is_open(self):
+        with self.lock:
+            return time.monotonic() < self.values[3]
+
+    # Function: record_success()
+    # Purpose: Reset the failures in a row
+    # Precondition: None
+    # Postcondition: The circuit breaker stays closed
+    def record_success(self):
+        with self.lock:
+            self.values[2] = 0
+
+    # Function: record_failure()
+    # Purpose: Count a failure and open the circuit breaker if the host failed too many times in a row
+    # Precondition: The failure limit and the cooldown in seconds must be provided
+    # Postcondition: Returns True if the circuit breaker was opened
+    def record_failure(self, failure_limit, cooldown):
+        with self.lock:
+            self.values[2] += 1
+
+            # after the cooldown, a single failure opens the breaker again until a request succeeds
+            if self.values[2] >= failure_limit:
+                self.values[3] = time.monotonic() + cooldown
+                return True
+
+            return False
+
+# Class: pending_request
+# Purpose: Hold one request that is waiting to be sent or being sent, so identical requests can share its result
+class pending_request:
+    # Function: __init__()
+    # Purpose: Initialize a request that has not been sent yet
+    # Precondition: A URL, a priority, the arrival order (sequence), and whether to keep the response as a fallback must be provided
+    # Postcondition: Sets up the request; done is set when the result or error is ready
+    def __init__(self, url, priority, sequence, keep_fallback):
+        self.url = url
+        self.priority = priority
+        self.sequence = sequence
+        self.keep_fallback = keep_fallback
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# Class: fetch_governor
+# Purpose: Sit between the fetch classes and the network to merge identical requests, limit the request rate, and stop calling a failing API
+class fetch_governor:
+    # Function: __init__()
+    # Purpose: Initialize the governor
+    # Precondition: fetch_function(url, headers) must send the request and return the JSON; host_rates optionally maps a host to its (rate, burst)
+    # Postcondition: Sets up the shared state used by every client thread
+    def __init__(self, fetch_function, rate = 2, burst = 5, host_rates = None, failure_limit = 5, cooldown = 30, cache_size = 200, fallback_seconds = 1800):
+        self.fetch_function = fetch_function
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.failure_limit = failure_limit # failures in a row before the circuit breaker opens
+        self.cooldown = cooldown # seconds the circuit breaker stays open
+        self.cache_size = cache_size
+        self.fallback_seconds = fallback_seconds # older responses are not used as a fallback
+
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+        self.in_flight = {} # url -> pending_request being waited on or sent
+        self.waiting = {} # host -> list of pending_request waiting for a token
+        self.hosts = {} # host -> host_state (token bucket and circuit breaker)
+        self.last_responses = OrderedDict() # url -> (last good JSON response, time it was received), used when the API is failing
+
+    # Function: share_between_workers()
+    # Purpose: Put the rate limit and circuit breaker of the known hosts in shared memory so the worker processes use them together
+    # Precondition: A multiprocessing context must be provided; must be called before the workers are started
+    # Postcondition: All the workers share one token bucket and one failure count per host in host_rates (other hosts stay per worker)
+    def share_between_workers(self, context):
+        with self.condition:
+            for host, (rate, burst) in self.host_rates.items():
+                self.hosts[host] = host_state(rate, burst, context)
+
+    # Function: get_host()
+    # Purpose: Get the token bucket and circuit breaker of a host, creating them the first time the host is used
+    # Precondition: A host must be provided; the caller must hold the condition
+    # Postcondition: Returns the host_state of the host
+    def get_host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            rate, burst = self.host_rates.get(host, (self.rate, self.burst))
+            state = self.hosts[host] = host_state(rate, burst)
+        return state
+
+    # Function: get_json()
+    # Purpose: Get the JSON response of a URL through the governor
+    # Precondition: A URL must be provided; headers, priority (INTERACTIVE/PREFETCH), and keep_fallback (False for data that never changes and is cached elsewhere) are optional
+    # Postcondition: Returns the JSON response, or the last good response if the API is failing and it is recent; raises the error if there is none
+    def get_json(self, url, headers = None, priority = INTERACTIVE, keep_fallback = True):
+        with self.condition:
+            request = self.in_flight.get(url)
+
+            if request is None:
+                request = pending_request(url, priority, next(self.sequence), keep_fallback)
+                self.in_flight[url] = request
+                is_sender = True
+            else:
+                # the same URL is already being fetched, wait for its result instead of sending it again
+                metrics.increment('upstream_coalesced')
+                is_sender = False
+
+                # an interactive request moves a queued prefetch request up
+                if priority < request.priority:
+                    request.priority = priority
+                    self.condition.notify_all()
+
+        if is_sender:
+            self.send(request, headers)
+        else:
+            request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    # Function: send()
+    # Purpose: Send a request when the rate limit allows it and store its result for every thread waiting on it
+    # Precondition: A pending_request created by get_json() and the request headers must be provided
+    # Postcondition: Sets the request's result or error, removes it from the in flight requests, and sets done
+    def send(self, request, headers):
+        host = urlparse(request.url).netloc
+
+        try:
+            if self.is_open(host):
+                raise upstream_unavailable(f"{host} is failing, not sending requests for now")
+
+            self.wait_for_token(host, request)
+            request.result = self.fetch_function(request.url, headers)
+            self.record_success(host, request)
+
+        except Exception as error:
+            if not isinstance(error, upstream_unavailable):
+                self.record_failure(host)
+
+            # fall back on the last good response if there is a recent one
+            with self.condition:
+                last_response, received_at = self.last_responses.get(request.url, (None, 0))
+
+            if last_response is not None and time.monotonic() - received_at < self.fallback_seconds:
+                metrics.increment('upstream_fallbacks')
+                request.result = last_response
+            elif isinstance(error, upstream_unavailable):
+                request.error = error
+            else:
+                request.error = upstream_unavailable(f"Request to {host} failed: {error}")
+
+        finally:
+            with self.condition:
+                del self.in_flight[request.url]
+            request.done.set()
+
+    # Function: wait_for_token()
+    # Purpose: Wait until the request is the first in its host's queue and a token is available
+    # Precondition: The host and the pending_request must be provided
+    # Postcondition: Returns once the request is allowed to be sent
+    def wait_for_token(self, host, request):
+        with self.condition:
+            state = self.get_host(host)
+
+            queue = self.waiting.setdefault(host, [])
+            queue.append(request)
+            metrics.add_gauge('upstream_queued', 1)
+
+            try:
+                while True:
+                    # interactive requests first, then in order of arrival
+                    first = min(queue, key = lambda waiting: (waiting.priority, waiting.sequence))
+
+                    if first is request:
+                        wait_seconds = state.take()
+                        if wait_seconds == 0:
+                            return
+                        self.condition.wait(wait_seconds)
+                    else:
+                        self.condition.wait()
+            finally:
+                queue.remove(request)
+                metrics.add_gauge('upstream_queued', -1)
+                self.condition.notify_all() # let the next request in the queue check for a token
+
+    # Function: is_open()
+    # Purpose: Check if the circuit breaker of a host is open (requests to the host are not sent)
+    # Precondition: A host must be provided
+    # Postcondition: Returns True while the host is cooling down after too many failures
+    def is_open(self, host):
+        with self.condition:
+            return self.get_host(host).is_open()
+
+    # Function: record_success()
+    # Purpose: Reset the failures of a host and keep the response in case the host fails later
+    # Precondition: The host and the pending_request with its result must be provided
+    # Postcondition: Closes the circuit breaker and stores the response if the request keeps a fallback (only the latest cache_size URLs are kept)
+    def record_success(self, host, request):
+        with self.condition:
+            self.get_host(host).record_success()
+
+            if not request.keep_fallback:
+                return
+
+            self.last_responses[request.url] = (request.result, time.monotonic())
+            self.last_responses.move_to_end(request.url)
+            if len(self.last_responses) > self.cache_size:
+                self.last_responses.popitem(last = False)
+
+    # Function: record_failure()
+    # Purpose: Count a failed request and open the circuit breaker if the host failed too many times in a row
+    # Precondition: A host must be provided
+    # Postcondition: After failure_limit failures in a row, requests to the host are not sent for cooldown seconds
+    def record_failure(self, host):
+        with self.condition:
+            if self.get_host(host).record_failure(self.failure_limit, self.cooldown):
+                metrics.increment('circuit_breaker_opens')
@@ -0,0 +1,154 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+import threading
+import time
+
+# upper limits (in seconds) of the time buckets used for the stage timers
+TIME_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10]
+
+# Class: server_metrics
+# Purpose: Keep track of the time spent in each stage of a request and of the server counters, cheap enough to always be on
+class server_metrics:
+    # Function: __init__()
+    # Purpose: Initialize empty stage timers, counters, and gauges
+    # Precondition: None
+    # Postcondition: Sets up the storage for the metrics and the lock shared by the client threads
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {} # stage name -> [count, total seconds, max seconds, bucket counts]
+        self.counters = {} # counter name -> value that only goes up (e.g., season_cache_hits)
+        self.gauges = {} # gauge name -> current value (e.g., active_connections)
+        self.start_time = time.time()
+        self.worker_number = None # set when the server runs several worker processes, each worker only counts its own clients
+
+    # Function: add_time()
+    # Purpose: Record how long one run of a stage took
+    # Precondition: A stage name and the time in seconds must be provided
+    # Postcondition: Updates the count, total, max, and time bucket of the stage
+    def add_time(self, stage, seconds):
+        with self.lock:
+            stage_times = self.stages.get(stage)
+            if stage_times is None:
+                stage_times = self.stages[stage] = [0, 0.0, 0.0, [0] * len(TIME_BUCKETS)]
+
+            stage_times[0] += 1
+            stage_times[1] += seconds
+            stage_times[2] = max(stage_times[2], seconds)
+
+            # only the first bucket that fits is counted, the buckets are added up when they are displayed
+            for i, limit in enumerate(TIME_BUCKETS):
+                if seconds <= limit:
+                    stage_times[3][i] += 1
+                    break
+
+    # Function: time_stage()
+    # Purpose: Time the code inside a 'with' block as one run of a stage
+    # Precondition: A stage name must be provided (e.g., 'upstream_http')
+    # Postcondition: The time of the block is recorded even if the block raises an error
+    @contextmanager
+    def time_stage(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    # Function: increment()
+    # Purpose: Add to a counter
+    # Precondition: A counter name must be provided; amount defaults to 1
+    # Postcondition: The counter is increased by the amount
+    def increment(self, name, amount = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Function: add_gauge()
+    # Purpose: Move a gauge up or down (e.g., +1 when a client connects and -1 when it leaves)
+    # Precondition: A gauge name and amount must be provided
+    # Postcondition: The gauge is changed by the amount
+    def add_gauge(self, name, amount):
+        with self.lock:
+            self.gauges[name] = self.gauges.get(name, 0) + amount
+
+    # Function: snapshot()
+    # Purpose: Copy the current metrics so they can be displayed without holding the lock
+    # Precondition: None
+    # Postcondition: Returns a (stages, counters, gauges) copy of the metrics
+    def snapshot(self):
+        with self.lock:
+            stages = {stage: [values[0], values[1], values[2], list(values[3])] for stage, values in self.stages.items()}
+            return stages, dict(self.counters), dict(self.gauges)
+
+    # Function: summary()
+    # Purpose: Format the metrics as a readable message for the client
+    # Precondition: None
+    # Postcondition: Returns a string with the stage timers, counters, and gauges
+    def summary(self):
+        stages, counters, gauges = self.snapshot()
+
+        title = "Server metrics" if self.worker_number is None else f"Server metrics of worker {self.worker_number} only"
+        lines = [f"{title} (up for {time.time() - self.start_time:.0f} seconds)", "", "Stage timers:"]
+        for stage, (count, total, longest, buckets) in sorted(stages.items()):
+            lines.append(f"  {stage}: {count} calls, average {total / count * 1000:.2f} ms, max {longest * 1000:.2f} ms")
+
+        lines += ["", "Counters:"]
+        lines += [f"  {name}: {value}" for name, value in sorted(counters.items())]
+
+        lines += ["", "Gauges:"]
+        lines += [f"  {name}: {value}" for name, value in sorted(gauges.items())]
+
+        return "\n".join(lines) + "\n"
+
+    # Function: prometheus_text()
+    # Purpose: Format the metrics in the Prometheus text format
+    # Precondition: None
+    # Postcondition: Returns the metrics as Prometheus text (stage timers are histograms)
+    def prometheus_text(self):
+        stages, counters, gauges = self.snapshot()
+
+        lines = ["# TYPE nba_stage_seconds histogram"]
+        for stage, (count, total, longest, buckets) in sorted(stages.items()):
+            cumulative = 0
+            for limit, bucket_count in zip(TIME_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'nba_stage_seconds_bucket{{stage="{stage}",le="{limit}"}} {cumulative}')
+            lines.append(f'nba_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'nba_stage_seconds_sum{{stage="{stage}"}} {total}')
+            lines.append(f'nba_stage_seconds_count{{stage="{stage}"}} {count}')
+
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE nba_{name}_total counter")
+            lines.append(f"nba_{name}_total {value}")
+
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE nba_{name} gauge")
+            lines.append(f"nba_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    # Function: start_http_server()
+    # Purpose: Serve the Prometheus text on a local port in a background thread
+    # Precondition: A free port must be provided
+    # Postcondition: GET requests on http://localhost:<port>/metrics return the metrics; returns the HTTP server
+    def start_http_server(self, port):
+        metrics = self
+
+        # answer every GET request with the current metrics
+        class metrics_handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # do not print a line for every scrape
+            def log_message(self, format, *args):
+                pass
+
+        http_server = ThreadingHTTPServer(("localhost", port), metrics_handler)
+        threading.Thread(target = http_server.serve_forever, daemon = True).start()
+        return http_server
+
+# metrics shared by every module of the server
+metrics = server_metrics()
@@ -0,0 +1,64 @@
+import heapq
+import unicodedata
+
+# Function: normalize_name()
+# Purpose: Convert a player name into a plain lowercase form so that case, accents, and punctuation do not affect matching
+# Precondition: A player name string must be provided
+# Postcondition: Returns the normalized name (e.g., 'Luka Dončić' -> 'luka doncic')
+def normalize_name(name):
+    # remove accents (e.g., č -> c)
+    plain_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+
+    # keep only letters and numbers, everything else becomes a single space
+    cleaned = ''.join(char if char.isalnum() else ' ' for char in plain_name.lower())
+    return ' '.join(cleaned.split())
+
+# Function: get_trigrams()
+# Purpose: Split a normalized name into its set of 3 character pieces (trigrams)
+# Precondition: A normalized name string must be provided
+# Postcondition: Returns a set of trigrams, padded so that the start and end of the name are also matched
+def get_trigrams(name):
+    padded_name = f"  {name} "
+    return {padded_name[i:i + 3] for i in range(len(padded_name) - 2)}
+
+# Class: player_index
+# Purpose: Suggest the closest player names for a misspelled name using a trigram index built once per season
+class player_index:
+    # Function: __init__()
+    # Purpose: Build the trigram index for the given list of player names
+    # Precondition: A list of player names must be provided (e.g., the PLAYER_NAME column of a season)
+    # Postcondition: Maps every trigram to the players that contain it so a search only looks at players sharing a trigram
+    def __init__(self, player_names):
+        self.player_names = list(dict.fromkeys(player_names)) # remove duplicates but keep the order
+        self.trigram_counts = [] # number of trigrams for each player name
+        self.trigram_map = {} # trigram -> list of player positions in player_names
+
+        for position, name in enumerate(self.player_names):
+            trigrams = get_trigrams(normalize_name(name))
+            self.trigram_counts.append(len(trigrams))
+
+            for trigram in trigrams:
+                self.trigram_map.setdefault(trigram, []).append(position)
+
+    # Function: search()
+    # Purpose: Find the player names most similar to the given name
+    # Precondition: A player name must be provided; limit is the max number of names and min_score the lowest similarity kept
+    # Postcondition: Returns a list of (player name, similarity score) pairs sorted from the closest match, similarity is between 0 and 1
+    def search(self, player_name, limit = 3, min_score = 0.3):
+        query_trigrams = get_trigrams(normalize_name(player_name))
+
+        # count how many trigrams each player shares with the name searched
+        shared_counts = {}
+        for trigram in query_trigrams:
+            for position in self.trigram_map.get(trigram, ()):
+                shared_counts[position] = shared_counts.get(position, 0) + 1
+
+        # rank with the dice similarity: 2 * shared / (trigrams in query + trigrams in name)
+        scores = []
+        for position, shared in shared_counts.items():
+            score = 2 * shared / (len(query_trigrams) + self.trigram_counts[position])
+            if score >= min_score:
+                scores.append((score, position))
+
+        best_scores = heapq.nlargest(limit, scores)
+        return [(self.player_names[position], round(score, 3)) for score, position in best_scores]
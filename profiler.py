@@ -0,0 +1,138 @@
+from collections import Counter
+from datetime import datetime
+import linecache
+import os
+import sys
+import threading
+import time
+
+# Function: frame_label()
+# Purpose: Describe a stack frame as 'function (file:line)' for the profile files
+# Precondition: A Python frame object must be provided
+# Postcondition: Returns the label of the function and the line running in the frame
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+# Function: is_waiting_for_client()
+# Purpose: Check if a thread is idle, waiting for the client's next message
+# Precondition: The innermost Python frame of the thread must be provided
+# Postcondition: Returns True if the running line calls recv (recv is not a Python function, so the line that called it is the innermost frame)
+def is_waiting_for_client(frame):
+    return ".recv(" in linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+
+# Class: sampling_profiler
+# Purpose: Sample the stacks of the client threads for a few seconds to find where a live server spends its time
+class sampling_profiler:
+    # Function: __init__()
+    # Purpose: Initialize the profiler
+    # Precondition: interval is the time in seconds between two samples; thread_prefix is the name prefix of the threads to sample
+    # Postcondition: Sets up the profiler, nothing is sampled until start() is called
+    def __init__(self, interval = 0.005, thread_prefix = "client"):
+        self.interval = interval
+        self.thread_prefix = thread_prefix
+        self.file_prefix = "profile" # the worker number is added when the server runs several worker processes
+        self.running = False
+        self.lock = threading.Lock()
+
+    # Function: start()
+    # Purpose: Start sampling in a background thread that stops by itself after the given time
+    # Precondition: The number of seconds to profile must be provided
+    # Postcondition: Returns the (collapsed stack file, top functions file) names, or None if a profile is already running
+    def start(self, seconds):
+        with self.lock:
+            if self.running:
+                return None
+            self.running = True
+
+        file_name = f"{self.file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        output_files = (f"{file_name}.folded", f"{file_name}_top.txt")
+
+        threading.Thread(target = self.run, args = (seconds, output_files), daemon = True).start()
+        return output_files
+
+    # Function: sample()
+    # Purpose: Take one sample of the stack of every client thread that is not waiting for its client
+    # Precondition: None
+    # Postcondition: Returns (list of stacks, number of threads skipped because they were waiting in recv); each stack is a tuple of frame labels from the outermost call to the running function
+    def sample(self):
+        thread_ids = {thread.ident for thread in threading.enumerate() if thread.name.startswith(self.thread_prefix)}
+
+        stacks = []
+        idle_threads = 0
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id not in thread_ids:
+                continue
+
+            # idle connections would hide the time spent on actual requests
+            if is_waiting_for_client(frame):
+                idle_threads += 1
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stacks.append(tuple(reversed(stack)))
+
+        return stacks, idle_threads
+
+    # Function: run()
+    # Purpose: Sample the client threads until the time is up, then write the profile files
+    # Precondition: The number of seconds and the output file names must be provided
+    # Postcondition: Writes the collapsed stacks and the top functions files and allows a new profile to be started
+    def run(self, seconds, output_files):
+        stack_counts = Counter()
+        idle_samples = 0
+        rounds = 0
+        start_time = time.time()
+
+        try:
+            while time.time() - start_time < seconds:
+                stacks, idle_threads = self.sample()
+                stack_counts.update(stacks)
+                idle_samples += idle_threads
+                rounds += 1
+                time.sleep(self.interval)
+
+            # time actually covered by one sample (the interval plus the time taken to sample)
+            sample_seconds = (time.time() - start_time) / max(rounds, 1)
+
+            self.write_collapsed(stack_counts, output_files[0])
+            self.write_top_functions(stack_counts, idle_samples, sample_seconds, output_files[1])
+        finally:
+            with self.lock:
+                self.running = False
+
+    # Function: write_collapsed()
+    # Purpose: Write the stacks in the collapsed format read by flamegraph tools ('outer;inner;running_function count')
+    # Precondition: The stack counts and an output file name must be provided
+    # Postcondition: Saves one line per distinct stack to the file
+    def write_collapsed(self, stack_counts, file_name):
+        with open(file_name, mode = 'w') as file:
+            for stack, count in stack_counts.most_common():
+                file.write(f"{';'.join(stack)} {count}\n")
+
+    # Function: write_top_functions()
+    # Purpose: Write the functions that were running or waiting on a call for the most time (cumulative time)
+    # Precondition: The stack counts, the number of skipped idle samples, the seconds covered by one sample, and an output file name must be provided
+    # Postcondition: Saves the top 30 lines (function, file, and running line) with their estimated cumulative and own time to the file
+    def write_top_functions(self, stack_counts, idle_samples, sample_seconds, file_name, limit = 30):
+        cumulative_counts = Counter()
+        own_counts = Counter()
+        total_samples = sum(stack_counts.values())
+
+        for stack, count in stack_counts.items():
+            # a recursive function is only counted once per stack
+            for label in set(stack):
+                cumulative_counts[label] += count
+            own_counts[stack[-1]] += count
+
+        with open(file_name, mode = 'w') as file:
+            file.write(f"{total_samples} thread samples, one every {sample_seconds * 1000:.1f} ms\n")
+            file.write(f"{idle_samples} samples of threads waiting for a client message in recv were skipped ({idle_samples * sample_seconds:.2f} s)\n")
+            file.write("Times are wall clock times, so waiting on the API or a lock is counted in the line that waits\n\n")
+            file.write(f"{'cumulative s':>12} {'cumulative %':>12} {'own s':>8}  function (file:running line)\n")
+
+            for label, count in cumulative_counts.most_common(limit):
+                file.write(f"{count * sample_seconds:>12.2f} {count / total_samples * 100:>12.1f} {own_counts[label] * sample_seconds:>8.2f}  {label}\n")
@@ -0,0 +1,132 @@
+from fetch_data import nba_scoreboard
+from metrics import metrics
+import queue
+import threading
+import time
+
+# Class: date_feed
+# Purpose: Hold the clients following one date and the last known state of its games
+class date_feed:
+    # Function: __init__()
+    # Purpose: Initialize a feed with no subscribers and no known games
+    # Precondition: A game date in YYYYMMDD format must be provided
+    # Postcondition: Sets up the feed, game_states is None until the first poll succeeds
+    def __init__(self, game_date):
+        self.game_date = game_date
+        self.subscribers = set() # one queue per client following the date
+        self.game_states = None # 'home team vs away team' -> (status, home score, away score)
+
+# Function: is_final()
+# Purpose: Check if every game of a date is over
+# Precondition: A dictionary of game states must be provided
+# Postcondition: Returns True if there is at least one game and all of them are FINAL
+def is_final(game_states):
+    return bool(game_states) and all(status == 'FINAL' for status, home_score, away_score in game_states.values())
+
+# Function: format_game()
+# Purpose: Format the score and status of one game on a single short line
+# Precondition: The game name and its (status, home score, away score) must be provided
+# Postcondition: Returns the line (e.g., 'Lakers vs Celtics 98-95 4TH 2:31')
+def format_game(game, game_state):
+    status, home_score, away_score = game_state
+    return f"{game} {home_score}-{away_score} {status}"
+
+# Function: full_update()
+# Purpose: Build the update with every game of a date, sent to a client when it starts following the date
+# Precondition: The game date and its game states must be provided
+# Postcondition: Returns a (message, all games final) update
+def full_update(game_date, game_states):
+    if not game_states:
+        return (f"No games found for {nba_scoreboard(game_date).format_date(game_date)}", True)
+
+    return ("\n".join(format_game(game, game_state) for game, game_state in game_states.items()), is_final(game_states))
+
+# Class: scoreboard_hub
+# Purpose: Poll the scoreboard once per interval for each followed date and push only the games that changed to every client following it
+class scoreboard_hub:
+    # Function: __init__()
+    # Purpose: Initialize the hub with no followed dates
+    # Precondition: interval is the number of seconds between two polls of a date
+    # Postcondition: Sets up the feeds and the lock shared by the client threads
+    def __init__(self, interval = 15):
+        self.interval = interval
+        self.feeds = {} # game date -> date_feed
+        self.lock = threading.Lock()
+
+    # Function: subscribe()
+    # Purpose: Start following a date, the poll of the date is started if no one else follows it
+    # Precondition: A valid game date in YYYYMMDD format must be provided
+    # Postcondition: Returns the queue where (message, all games final) updates are put, starting with the current scores if they are known
+    def subscribe(self, game_date):
+        updates = queue.Queue()
+
+        with self.lock:
+            feed = self.feeds.get(game_date)
+            if feed is None:
+                feed = self.feeds[game_date] = date_feed(game_date)
+                threading.Thread(target = self.poll, args = (feed,), daemon = True).start()
+
+            feed.subscribers.add(updates)
+            metrics.add_gauge('scoreboard_subscribers', 1)
+
+            # a client joining later gets every game once, then only the changes
+            if feed.game_states is not None:
+                updates.put(full_update(game_date, feed.game_states))
+
+        return updates
+
+    # Function: unsubscribe()
+    # Purpose: Stop following a date
+    # Precondition: The game date and the queue returned by subscribe() must be provided
+    # Postcondition: The client gets no more updates; the poll stops by itself once no client follows the date
+    def unsubscribe(self, game_date, updates):
+        with self.lock:
+            self.feeds[game_date].subscribers.discard(updates)
+            metrics.add_gauge('scoreboard_subscribers', -1)
+
+    # Function: poll()
+    # Purpose: Fetch the scoreboard of a date once per interval and send the changed games to its subscribers
+    # Precondition: A date_feed must be provided
+    # Postcondition: Runs in its own thread until the date has no subscribers
+    def poll(self, feed):
+        nba_data = nba_scoreboard(feed.game_date)
+
+        while True:
+            with self.lock:
+                if not feed.subscribers:
+                    del self.feeds[feed.game_date]
+                    return
+
+            # one request per interval no matter how many clients follow the date
+            try:
+                game_states = nba_data.get_game_states()
+            except Exception:
+                metrics.increment('scoreboard_poll_errors')
+                game_states = None
+
+            if game_states is not None:
+                self.push_changes(feed, game_states)
+
+            time.sleep(self.interval)
+
+    # Function: push_changes()
+    # Purpose: Compare the new scoreboard with the last one and send the games that changed
+    # Precondition: A date_feed and the new game states must be provided
+    # Postcondition: Every subscriber gets one message with the changed games (nothing is sent if nothing changed)
+    def push_changes(self, feed, game_states):
+        with self.lock:
+            old_states = feed.game_states
+            feed.game_states = game_states
+
+            if old_states is None:
+                update = full_update(feed.game_date, game_states)
+            else:
+                changed = [format_game(game, game_state) for game, game_state in game_states.items() if old_states.get(game) != game_state]
+                if not changed:
+                    return
+                update = ("\n".join(changed), is_final(game_states))
+
+            for updates in feed.subscribers:
+                updates.put(update)
+
+            metrics.increment('scoreboard_updates_pushed', len(feed.subscribers))
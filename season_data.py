@@ -0,0 +1,111 @@
+from fetch_data import nba_stats
+from fetch_governor import INTERACTIVE
+from player_search import player_index
+from metrics import metrics
+from datetime import datetime
+import threading
+import time
+
+# Function: current_season_id()
+# Purpose: Find the season ID of the season currently being played (a new season starts in October)
+# Precondition: None
+# Postcondition: Returns the current season ID string (e.g., '2024-25')
+def current_season_id():
+    today = datetime.now()
+    start_year = today.year if today.month >= 10 else today.year - 1
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+# Function: all_season_keys()
+# Purpose: List every (season ID, season type) pair that has player stats, from 1996-97 to the current season
+# Precondition: None
+# Postcondition: Returns a list of (season_id, season_type) pairs (e.g., ('2024-25', 'Playoffs'))
+def all_season_keys():
+    last_year = int(current_season_id()[:4])
+    season_ids = [f"{year}-{(year + 1) % 100:02d}" for year in range(1996, last_year + 1)]
+    return [(season_id, season_type) for season_id in season_ids for season_type in ['Regular Season', 'Playoffs']]
+
+# Class: season_cache
+# Purpose: Keep each loaded season's player stats and player name index in memory so they are only fetched and built once
+class season_cache:
+    # Function: __init__()
+    # Purpose: Initialize an empty season cache
+    # Precondition: refresh_seconds is how long the current season is kept before it is fetched again (past seasons never change)
+    # Postcondition: Sets up the storage for the seasons and the locks used by the client threads
+    def __init__(self, refresh_seconds = 600):
+        self.refresh_seconds = refresh_seconds
+        self.seasons = {} # (season_id, season_type) -> (stats_df, name_index, load time)
+        self.season_locks = {} # (season_id, season_type) -> lock, so a season is only read from or saved to shared memory by one thread at a time
+        self.lock = threading.Lock()
+        self.shared_store = None # shared_season_store used when the server runs several worker processes
+
+    # Function: is_fresh()
+    # Purpose: Check if a cached season can still be used
+    # Precondition: A season ID and the time the season was loaded must be provided
+    # Postcondition: Returns True for past seasons and for the current season if it was loaded recently
+    def is_fresh(self, season_id, loaded_at):
+        return season_id != current_season_id() or time.time() - loaded_at < self.refresh_seconds
+
+    # Function: get_season()
+    # Purpose: Return the player stats and player name index for a season, fetching them only if they are not cached
+    # Precondition: A valid season ID and season type (Regular Season/Playoffs) must be provided; priority is INTERACTIVE or PREFETCH
+    # Postcondition: Returns a (stats_df, name_index) pair for the season
+    def get_season(self, season_id, season_type, priority = INTERACTIVE):
+        key = (season_id, season_type)
+
+        # return right away if the season is already loaded
+        entry = self.seasons.get(key)
+        if entry and self.is_fresh(season_id, entry[2]):
+            metrics.increment('season_cache_hits')
+            return entry[0], entry[1]
+
+        metrics.increment('season_cache_misses')
+        with self.lock:
+            season_lock = self.season_locks.setdefault(key, threading.Lock())
+
+        # use the copy saved in shared memory by another worker process if there is one
+        with season_lock:
+            # another thread may have loaded the season while this one was waiting
+            entry = self.seasons.get(key)
+            if entry and self.is_fresh(season_id, entry[2]):
+                return entry[0], entry[1]
+
+            stats_df = self.shared_store.load(season_id, season_type) if self.shared_store else None
+
+        # only one worker process fetches a season, the others wait for it to be saved in shared memory
+        claimed = False
+        if stats_df is None and self.shared_store:
+            claimed = self.shared_store.claim(season_id, season_type)
+            if not claimed:
+                stats_df = self.shared_store.wait_for(season_id, season_type)
+
+        try:
+            fetched = stats_df is None
+            if fetched:
+                # fetched without holding the lock: threads missing the same season share one request through the fetch governor (an interactive request also moves a prefetch up)
+                nba_data = nba_stats(season_id, season_type.replace(" ", "%20"), priority, keep_fallback = season_id == current_season_id()) # past seasons never change and stay in this cache
+                stats_df = nba_data.get_stats(['PLAYER_ID', 'PLAYER_NAME', 'GP', 'AST', 'REB', 'STL', 'BLK', 'PTS']) # IDs and games played are kept for the career index
+            else:
+                metrics.increment('shared_season_hits')
+
+            with season_lock:
+                # a thread that fetched at the same time may have saved the season already
+                entry = self.seasons.get(key)
+                if entry and self.is_fresh(season_id, entry[2]):
+                    return entry[0], entry[1]
+
+                if self.shared_store and fetched:
+                    stats_df = self.shared_store.save(season_id, season_type, stats_df)
+
+                name_index = player_index(stats_df['PLAYER_NAME'].tolist())
+
+                self.seasons[key] = (stats_df, name_index, time.time())
+
+                # close the shared memory of the version this entry replaced (it is tried again later if a DataFrame still uses it)
+                if self.shared_store:
+                    entry = None
+                    self.shared_store.close_retired()
+
+                return stats_df, name_index
+        finally:
+            if claimed:
+                self.shared_store.release_claim(season_id, season_type)
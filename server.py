@@ -3,27 +3,115 @@ from helper_function import *
 import socket
 import sys
 import threading
+import queue
+import time
+from season_data import season_cache
+from career_index import career_index
+from metrics import metrics
+from fetch_governor import upstream_unavailable
+from profiler import sampling_profiler
+from shared_seasons import shared_season_store
+from scoreboard_hub import scoreboard_hub
+from multiprocessing import resource_tracker
+from multiprocessing.managers import SyncManager
+import multiprocessing
+import signal
+
+# seasons loaded by any client thread, shared so each season is only fetched and indexed once
+seasons = season_cache()
+
+# players followed across all seasons, built the first time a client asks for career stats
+careers = career_index(seasons)
+
+# samples the client threads when an admin asks for a profile
+profiler = sampling_profiler()
+
+# polls the scoreboard once for all the clients following the same date
+scoreboards = scoreboard_hub()
+
+# reply sent when the NBA or Fox Sports API keeps failing and there is no cached data
+UPSTREAM_ERROR = "The NBA data service is not responding right now and there is no saved data for this request. Please try again later."
+
+# options of the client main menu
+MENU_OPTIONS = ["1", "2", "3", "4", "5", "6", "7", "8", "9"]
 
 # Function: player_stats()
 # Purpose: Retrieve and display statistics for a specific player during a given season
 # Precondition: A valid season ID, season type, and player name must be provided
-# Postcondition: Returns player stats if available; otherwise, an error message is returned
+# Postcondition: Returns player stats if available; otherwise, an error message with the closest player names is returned
 def player_stats(season_id, season_type, player_name):
-    # create an instance of the nba_stats class
-    nba_data = nba_stats(season_id, season_type.replace(" ", "%20"))
-
-    # fetch player stats
-    stats_df = nba_data.get_stats()
+    # get the player stats and player name index of the season
+    stats_df, name_index = seasons.get_season(season_id, season_type)
 
     # check if the player exists in the DataFrame
     if player_name in stats_df['PLAYER_NAME'].values:
         # get the stats associated to the player name
-        player_stats_df = stats_df[stats_df['PLAYER_NAME'] == player_name]
-        return f"Stats for {player_name}:\n{player_stats_df.to_string()}" # return if successful
+        player_stats_df = stats_df[stats_df['PLAYER_NAME'] == player_name].drop(columns = ['PLAYER_ID', 'GP'])
+
+        with metrics.time_stage('format'):
+            return f"Stats for {player_name}:\n{player_stats_df.to_string()}" # return if successful
     else:
-        # return an error message 
+        # suggest the closest player names so the user does not have to guess again
+        suggestions = name_index.search(player_name)
+        if suggestions:
+            suggested_names = ", ".join(name for name, score in suggestions)
+            return f"No stats found for player: {player_name}\nDid you mean: {suggested_names}?"
+
+        # return an error message
         return f"No stats found for player: {player_name}"
-    
+
+# Function: career_stats()
+# Purpose: Retrieve and display a player's career totals, averages, best seasons, and changes between seasons
+# Precondition: A season type (Regular Season/Playoffs) and player name (or player ID) must be provided
+# Postcondition: Returns the player's career summary if available; otherwise, an error message with the closest player names or the players sharing the name is returned
+def career_stats(season_type, player_name):
+    # find the player (all seasons are loaded on the first call)
+    player_ids = careers.find_players(player_name)
+
+    if not player_ids:
+        suggestions = careers.name_index.search(player_name)
+        if suggestions:
+            suggested_names = ", ".join(name for name, score in suggestions)
+            return f"No stats found for player: {player_name} ({season_type})\nDid you mean: {suggested_names}?"
+
+        return f"No stats found for player: {player_name} ({season_type})"
+
+    # different players with the same name are not merged, the user picks one by ID
+    if len(player_ids) > 1:
+        players_message = "\n".join(careers.describe_player(player_id) for player_id in player_ids)
+        return f"Several players are named {player_name}:\n{players_message}\nEnter the player ID of the one you want."
+
+    # get every season of the player
+    player_df = careers.get_player_seasons(player_ids[0], season_type)
+    player_name = careers.player_names[player_ids[0]]
+
+    # the player exists but never played that season type (e.g., no playoff games)
+    if player_df.empty:
+        return f"{player_name} has not played in the {season_type}. Returning to the main menu."
+
+    with metrics.time_stage('career_aggregate'):
+        totals = careers.career_totals(player_df)
+        averages = careers.career_averages(player_df)
+        best_seasons = careers.best_seasons(player_df)
+        changes = careers.season_changes(player_df)
+
+    with metrics.time_stage('format'):
+        # there is nothing to compare with if the player only played one season
+        changes_message = changes.to_string() if not changes.empty else "Only one season played"
+
+        # warn the user if some seasons could not be loaded from the API (they are tried again on the next request)
+        missing_message = ""
+        if careers.missing_seasons:
+            missing_names = ", ".join(f"{season_id} {season_type}" for season_id, season_type in careers.missing_seasons[:5])
+            missing_message = f"\nWarning: {len(careers.missing_seasons)} season(s) could not be loaded ({missing_names}), so these numbers may be incomplete.\n"
+
+        # build the career summary message
+        return (f"Career stats for {player_name} ({season_type}):\n{player_df.to_string()}\n\n"
+                f"Estimated career totals (each season's per game average times its games played, so they can be off from the official totals):\n{totals.to_frame().T.to_string(index = False)}\n\n"
+                f"Estimated career averages per game (from the estimated totals):\n{averages.to_frame().T.to_string(index = False)}\n\n"
+                f"Best season for each stat:\n{best_seasons.to_string()}\n\n"
+                f"Change from the previous season:\n{changes_message}\n{missing_message}")
+
 # Function: get_team_rank()
 # Purpose: Fetch and display team rankings for a given NBA season
 # Precondition: A valid season ID must be provided
@@ -34,7 +122,8 @@ def get_team_rank(season_id):
     rankings_df = nba_data.get_ranking() # fetch the team rankings
 
     # display the entire column of the df and return it
-    return f"\nTeam Rankings for the Season:\n{rankings_df.to_string()}\n"
+    with metrics.time_stage('format'):
+        return f"\nTeam Rankings for the Season:\n{rankings_df.to_string()}\n"
 
 # Function: get_games()
 # Purpose: Retrieve game scores and details for a specific date
@@ -75,7 +164,8 @@ def compare_player_stats(first_season_year, first_season_type, first_player_name
     second_player_data = nba_stats(second_season_year, second_season_type.replace(" ", "%20"))
 
     # generate the plot and save it
-    plot_stats(first_player_name, second_player_name, first_player_data, second_player_data)
+    with metrics.time_stage('plot'):
+        plot_stats(first_player_name, second_player_name, first_player_data, second_player_data)
 
 
 
@@ -90,15 +180,122 @@ def add_record(player_name, points, assists, rebounds):
 
     return f"New player stats added to stats_record.csv: {player_name} - Points: {points}, Assists: {assists}, Rebounds: {rebounds}"
 
+# Function: check_follow_request()
+# Purpose: Validate the date and number of minutes a client wants to follow
+# Precondition: The game date and the number of minutes must be provided as strings
+# Postcondition: Returns a message starting with 'Following' if both are valid; otherwise, an error message
+def check_follow_request(game_date, minutes):
+    # check if game data follow the correct format and length
+    if len(game_date) != 8 or not game_date.isdigit():
+        return "Check the date format. Please use YYYYMMDD format.\n"
+
+    try:
+        datetime.strptime(game_date, "%Y%m%d") # ensure that the game date is a valid calender date
+    except ValueError:
+        return "Invalid date format. Please use YYYYMMDD format."
+
+    # check that the number of minutes is valid
+    try:
+        minutes = int(minutes)
+    except ValueError:
+        return "Invalid number of minutes. Please enter a number between 1 and 240."
+
+    if not 1 <= minutes <= 240:
+        return "Invalid number of minutes. Please enter a number between 1 and 240."
+
+    return f"Following games on {nba_scoreboard(game_date).format_date(game_date)} for {minutes} minutes, only the games that change are sent (updates every {scoreboards.interval} seconds)\n"
+
+# Function: follow_games()
+# Purpose: Send the client the games of a date that changed until the time is up or every game is over
+# Precondition: A connected client_socket, a valid game date, and the number of minutes must be provided
+# Postcondition: The client is unsubscribed and gets a 'Subscription ended' line (every message ends with a newline so the client can split them)
+def follow_games(client_socket, game_date, minutes):
+    updates = scoreboards.subscribe(game_date)
+    end_time = time.time() + minutes * 60
+
+    try:
+        while time.time() < end_time:
+            # wait for the next change, or until the time is up
+            try:
+                message, all_final = updates.get(timeout = max(0, end_time - time.time()))
+            except queue.Empty:
+                break
+
+            send_message(client_socket, message + "\n")
+
+            # no more changes will come once every game is over
+            if all_final:
+                break
+    finally:
+        scoreboards.unsubscribe(game_date, updates)
+
+    send_message(client_socket, "Subscription ended\n")
+
+# Function: start_profile()
+# Purpose: Start sampling the client threads for a number of seconds to see where the server spends its time
+# Precondition: The number of seconds (1-300) must be provided as a string
+# Postcondition: Returns a message with the names of the profile files, or an error message
+def start_profile(seconds):
+    # check that the number of seconds is valid
+    try:
+        seconds = int(seconds)
+    except ValueError:
+        return "Invalid number of seconds. Please enter a number between 1 and 300."
+
+    if not 1 <= seconds <= 300:
+        return "Invalid number of seconds. Please enter a number between 1 and 300."
+
+    output_files = profiler.start(seconds)
+    if output_files is None:
+        return "A profile is already running, try again when it is done."
+
+    metrics.increment('profiles_started')
+    return f"Profiling the server for {seconds} seconds. The stacks will be saved to {output_files[0]} and the top functions to {output_files[1]}"
+
+# Function: upstream_reply()
+# Purpose: Call a function that fetches data and turn an API outage into an error message for the client
+# Precondition: The function and its arguments must be provided
+# Postcondition: Returns the function's response, or UPSTREAM_ERROR if the API is unavailable
+def upstream_reply(function, *args):
+    try:
+        return function(*args)
+    except upstream_unavailable:
+        metrics.increment('upstream_error_replies')
+        return UPSTREAM_ERROR
+
+# Function: send_message()
+# Purpose: Send a message to the client and time how long the send takes
+# Precondition: A connected client_socket and a message string must be provided
+# Postcondition: The encoded message is sent to the client
+def send_message(client_socket, message):
+    with metrics.time_stage('socket_send'):
+        client_socket.send(message.encode())
+
 # Function: server_function()
 # Purpose: Handle client requests for NBA stats-related options and process them on the server side
 # Precondition: A connected client_socket must be provided alongside the client_address
 # Postcondition: Responds to client requests, processes user input, and sends results back to the client
 def server_function(client_socket, client_address):
+    metrics.add_gauge('active_connections', 1)
+    try:
+        client_session(client_socket)
+    finally:
+        metrics.add_gauge('active_connections', -1)
+
+        # close the connection
+        client_socket.close()
+        print(f"(localhost, {client_address[1]}) disconnected")
+
+# Function: client_session()
+# Purpose: Answer the options selected by one client until the client exits
+# Precondition: A connected client_socket must be provided
+# Postcondition: Processes every option the client selects and returns when the client chooses to exit
+def client_session(client_socket):
     host = "localhost"
     while True:
         # receive the option selected by the client 
         choice = client_socket.recv(8000).decode()
+        metrics.increment(f'option_{choice}_requests' if choice in MENU_OPTIONS else 'invalid_option_requests')
 
         if choice == "1": # View Player Stats
             # receive season year, season type, and player name from the client 
@@ -106,10 +303,10 @@ def server_function(client_socket, client_address):
             season_year, season_type, player_name = player_info.split(',')
 
             # get the player stats or error messages if not found 
-            response = player_stats(season_year, season_type, player_name)
+            response = upstream_reply(player_stats, season_year, season_type, player_name)
 
             # send the response to the client
-            client_socket.send(response.encode())
+            send_message(client_socket, response)
 
             # check if no stats were found and prompt for a new player name 
             while "No stats found" in response:
@@ -118,8 +315,8 @@ def server_function(client_socket, client_address):
                 season_year, season_type, player_name = player_info.split(',')
 
                 # send the response back to the client again
-                response = player_stats(season_year, season_type, player_name)
-                client_socket.send(response.encode())
+                response = upstream_reply(player_stats, season_year, season_type, player_name)
+                send_message(client_socket, response)
 
         elif choice == "2": # Compare Player Stats
             # recive client message about first player info
@@ -127,8 +324,8 @@ def server_function(client_socket, client_address):
 
             # send response back to the client 
             first_season_year, first_season_type, first_player_name = first_player_data.split(',') 
-            first_response = player_stats(first_season_year, first_season_type, first_player_name)
-            client_socket.send(first_response.encode())
+            first_response = upstream_reply(player_stats, first_season_year, first_season_type, first_player_name)
+            send_message(client_socket, first_response)
 
             # check for error first player until valid
             while "No stats found" in first_response:
@@ -137,16 +334,16 @@ def server_function(client_socket, client_address):
 
                 # send the response again 
                 first_season_year, first_season_type, first_player_name = first_player_data.split(',')
-                first_response = player_stats(first_season_year, first_season_type, first_player_name)
-                client_socket.send(first_response.encode())
+                first_response = upstream_reply(player_stats, first_season_year, first_season_type, first_player_name)
+                send_message(client_socket, first_response)
 
             # recive client message about second player info
             second_player_data = client_socket.recv(8000).decode()
 
             # send response back to the client 
             second_season_year, second_season_type, second_player_name = second_player_data.split(',')
-            second_response = player_stats(second_season_year, second_season_type, second_player_name)
-            client_socket.send(second_response.encode())
+            second_response = upstream_reply(player_stats, second_season_year, second_season_type, second_player_name)
+            send_message(client_socket, second_response)
 
             # check error for second player until valid
             while "No stats found" in second_response:
@@ -155,22 +352,28 @@ def server_function(client_socket, client_address):
 
                 # send the response again 
                 second_season_year, second_season_type, second_player_name = second_player_data.split(',')
-                second_response = player_stats(second_season_year, second_season_type, second_player_name)
-                client_socket.send(second_response.encode())
+                second_response = upstream_reply(player_stats, second_season_year, second_season_type, second_player_name)
+                send_message(client_socket, second_response)
 
-            # use user inputs that was sent from the client to perform comparison and generate plot
-            comparison_result = compare_player_stats(first_season_year, first_season_type, first_player_name, second_season_year, second_season_type, second_player_name)
+            # use user inputs that was sent from the client to perform comparison and generate plot (not possible if a player's stats could not be fetched)
+            if UPSTREAM_ERROR in (first_response, second_response):
+                comparison_result = UPSTREAM_ERROR
+            else:
+                comparison_result = upstream_reply(compare_player_stats, first_season_year, first_season_type, first_player_name, second_season_year, second_season_type, second_player_name)
 
             # send the messsage back to the client
-            client_socket.send("Comparison plot has been saved successfully as a PNG image".encode())
+            if comparison_result == UPSTREAM_ERROR:
+                send_message(client_socket, UPSTREAM_ERROR)
+            else:
+                send_message(client_socket, "Comparison plot has been saved successfully as a PNG image")
 
         elif choice == "3": # View Recent Games
             # get the message from client about game date
             game_date = client_socket.recv(8000).decode()
 
             # send response back to the client
-            response = get_games(game_date)
-            client_socket.send(response.encode())
+            response = upstream_reply(get_games, game_date)
+            send_message(client_socket, response)
 
             # check for error until valid
             while "Check the date format" in response or "Do not have record" in response or "Invalid date format" in response:
@@ -178,8 +381,8 @@ def server_function(client_socket, client_address):
                 game_date = client_socket.recv(8000).decode()
 
                 # send response back to the client
-                response = get_games(game_date)
-                client_socket.send(response.encode())
+                response = upstream_reply(get_games, game_date)
+                send_message(client_socket, response)
 
             
         elif choice == "4": # View Team Rankings
@@ -187,8 +390,8 @@ def server_function(client_socket, client_address):
             season_year = client_socket.recv(8000).decode()
             
             # send response back to client
-            response = get_team_rank(season_year)
-            client_socket.send(response.encode())
+            response = upstream_reply(get_team_rank, season_year)
+            send_message(client_socket, response)
 
         elif choice == "5": # Add New Record
             # continue until valid user and password
@@ -200,11 +403,11 @@ def server_function(client_socket, client_address):
 
                 # if valid
                 if admin_username == "admin_user" and admin_password == "admin_pass":
-                    client_socket.send("Login successful".encode()) # send successful messsage to client
+                    send_message(client_socket, "Login successful") # send successful messsage to client
                     break # exit the code
 
                 else:
-                    client_socket.send("Invalid admin credentials, try again".encode()) # send error message to client
+                    send_message(client_socket, "Invalid admin credentials, try again") # send error message to client
 
             while True:
                 # get choice option from the client
@@ -217,45 +420,81 @@ def server_function(client_socket, client_address):
                     # send the response back to the client
                     player_name, points, assists, rebounds = stats_recieve.split(',') 
                     response = add_record(player_name, points, assists, rebounds)
-                    client_socket.send(response.encode())
+                    send_message(client_socket, response)
 
                 elif choice == "2":
-                    client_socket.send("Cancelled. Returning to the main menu".encode()) # send exit message back to client
+                    send_message(client_socket, "Cancelled. Returning to the main menu") # send exit message back to client
                     break # exit the code
 
+                elif choice == "3":
+                    # get the number of seconds to profile from the client
+                    seconds = client_socket.recv(8000).decode()
+
+                    # send the response back to the client
+                    response = start_profile(seconds)
+                    send_message(client_socket, response)
+
                 else:
-                    client_socket.send("Invalid choice. Please try again.".encode()) # send an invalid option back to client
+                    send_message(client_socket, "Invalid choice. Please try again.") # send an invalid option back to client
 
-        elif choice == "6": # Exit
-            # send response back to client
-            client_socket.send("Exiting the program. Bye!".encode())
-            break # exit from the loop
+        elif choice == "7": # View Career Stats
+            # receive season type and player name from the client
+            career_info = client_socket.recv(8000).decode()
+            season_type, player_name = career_info.split(',')
 
-        else:
-            # invalid option
-            client_socket.send("Invalid option, select between 1-6".encode())
+            # get the career stats or error messages if not found
+            response = upstream_reply(career_stats, season_type, player_name)
+            send_message(client_socket, response)
 
-    # close the connection
-    client_socket.close()
-    print(f"(localhost, {client_address[1]}) disconnected")
+            # check if no stats were found (or several players share the name) and prompt for a new player name or ID
+            while "No stats found" in response or "Several players are named" in response:
+                # get the new player name or ID from client
+                career_info = client_socket.recv(8000).decode()
+                season_type, player_name = career_info.split(',')
 
-def main():
-    # get the port from command line argument
-    if len(sys.argv) != 2:
-        print("Usage: python server.py <port>")
-        sys.exit(1)
+                # send the response back to the client again
+                response = upstream_reply(career_stats, season_type, player_name)
+                send_message(client_socket, response)
 
-    host = "localhost" 
-    port = int(sys.argv[1]) # port passed as command line argument
+        elif choice == "8": # View Server Metrics
+            # send the stage timers, counters, and gauges to the client
+            send_message(client_socket, metrics.summary())
 
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM) # create a socket object
+        elif choice == "9": # Follow Live Games
+            # get the message from client about game date and number of minutes
+            follow_info = client_socket.recv(8000).decode()
+            game_date, _, minutes = follow_info.partition(',')
 
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # reuse adress to avoid error
+            # send response back to the client
+            response = check_follow_request(game_date, minutes)
+            send_message(client_socket, response)
 
-    server_socket.bind((host, port)) # bind the socket to the host and port 
+            # check for error until valid
+            while not response.startswith("Following"):
+                follow_info = client_socket.recv(8000).decode()
+                game_date, _, minutes = follow_info.partition(',')
 
-    # start listening for incoming connections
-    server_socket.listen(5) # allow up to 5 clients to wait in the queue
+                response = check_follow_request(game_date, minutes)
+                send_message(client_socket, response)
+
+            # push the score changes until the time is up or every game is over
+            follow_games(client_socket, game_date, int(minutes))
+
+        elif choice == "6": # Exit
+            # send response back to client
+            send_message(client_socket, "Exiting the program. Bye!")
+            break # exit from the loop
+
+        else:
+            # invalid option
+            send_message(client_socket, "Invalid option, select between 1-9")
+
+# Function: accept_clients()
+# Purpose: Accept client connections and answer each client in its own thread
+# Precondition: A listening server_socket must be provided
+# Postcondition: Runs until the user presses Ctrl+C
+def accept_clients(server_socket):
+    host = "localhost"
 
     # accept connection from the client
     while True:
@@ -265,7 +504,7 @@ def main():
             print(f"Connected to ({host}, {client_address[1]})") 
 
             # create a new thread for the client
-            client_thread = threading.Thread(target = server_function, args = (client_socket, client_address))
+            client_thread = threading.Thread(target = server_function, args = (client_socket, client_address), name = f"client-{client_address[1]}") # named so the profiler can find it
 
             client_thread.start()
 
@@ -273,6 +512,95 @@ def main():
         except KeyboardInterrupt:
             print() # make new line for visual
             break 
+
+# Function: worker_main()
+# Purpose: Run one worker process of the server, all workers accept clients from the same listening socket
+# Precondition: The listening server_socket, the worker number, the metrics port (0 for none), and the shared season store must be provided
+# Postcondition: The worker answers clients until the user presses Ctrl+C
+def worker_main(server_socket, worker_number, metrics_port, shared_store):
+    # read the seasons from shared memory (the API rate limit and circuit breaker were shared before the workers were started)
+    seasons.shared_store = shared_store
+
+    # the profiler and the metrics (option 8) only see the client threads of this worker
+    profiler.file_prefix = f"profile_worker{worker_number}"
+    metrics.worker_number = worker_number
+
+    # each worker serves its own metrics on the next port
+    if metrics_port:
+        metrics.start_http_server(metrics_port + worker_number)
+
+    accept_clients(server_socket)
+
+# Function: run_workers()
+# Purpose: Start the worker processes of the server and free the shared season data when they stop
+# Precondition: A listening server_socket, the number of workers, and the metrics port (0 for none) must be provided
+# Postcondition: Runs until the user presses Ctrl+C, then stops the workers and removes the shared memory
+def run_workers(server_socket, workers, metrics_port):
+    # the workers are forked so they inherit the listening socket
+    if "fork" not in multiprocessing.get_all_start_methods():
+        print("Multiple workers are only supported on systems that can fork (Linux/macOS)")
+        sys.exit(1)
+
+    context = multiprocessing.get_context("fork")
+
+    # start the resource tracker before forking so a worker exiting does not remove the shared seasons of the others
+    resource_tracker.ensure_running()
+
+    # the manager keeps the segments created by the workers (all of them are removed at the end) and the seasons being fetched (it ignores Ctrl+C so it outlives the workers)
+    manager = SyncManager(ctx = context)
+    manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+    shared_store = shared_season_store(context.Lock(), manager.list(), manager.dict(), seasons.refresh_seconds)
+
+    # the workers share one rate limit and one circuit breaker per API host instead of each getting part of the rate
+    governor.share_between_workers(context)
+
+    processes = [context.Process(target = worker_main, args = (server_socket, worker_number, metrics_port, shared_store)) for worker_number in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+
+    # stop the workers when the user presses Ctrl+C
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+    finally:
+        shared_store.unlink_all()
+        manager.shutdown()
+        server_socket.close()
+
+def main():
+    # get the port (and the optional metrics port and number of workers) from command line argument
+    if len(sys.argv) not in (2, 3, 4):
+        print("Usage: python server.py <port> [metrics_port] [workers]")
+        sys.exit(1)
+
+    host = "localhost" 
+    port = int(sys.argv[1]) # port passed as command line argument
+    metrics_port = int(sys.argv[2]) if len(sys.argv) >= 3 else 0 # 0 means no metrics port
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else 1 # number of worker processes
+
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM) # create a socket object
+
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # reuse adress to avoid error
+
+    server_socket.bind((host, port)) # bind the socket to the host and port 
+
+    # start listening for incoming connections
+    server_socket.listen(5 * workers) # allow up to 5 clients per worker to wait in the queue
+
+    if workers > 1:
+        run_workers(server_socket, workers, metrics_port)
+    else:
+        # serve the metrics in the Prometheus text format (e.g., http://localhost:9100/metrics)
+        if metrics_port:
+            metrics.start_http_server(metrics_port)
+
+        accept_clients(server_socket)
             
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,239 @@
+from multiprocessing.shared_memory import SharedMemory
+from season_data import current_season_id
+import numpy as np
+import pandas as pd
+import struct
+import time
+
+# number columns of a season, each one is stored as 8 byte values one after the other
+NUMBER_COLUMNS = ['PLAYER_ID', 'GP', 'AST', 'REB', 'STL', 'BLK', 'PTS']
+
+# number columns stored as integers, the others are floats
+INTEGER_COLUMNS = ['PLAYER_ID', 'GP']
+
+# start of every segment: number of players and length of the player names in bytes
+HEADER = struct.Struct('<qq')
+
+# seconds after which a season claimed by a worker can be fetched by another one (the first worker may have crashed)
+CLAIM_SECONDS = 60
+
+# Class: shared_season_store
+# Purpose: Keep the season stats in shared memory so the worker processes of the server read the same copy instead of each holding their own
+class shared_season_store:
+    # Function: __init__()
+    # Purpose: Initialize the store shared by the worker processes
+    # Precondition: A multiprocessing lock, a manager list, and a manager dictionary created before the workers are started must be provided; refresh_seconds matches the season cache
+    # Postcondition: Sets up the store, the shared memory segments are created when the seasons are first loaded
+    def __init__(self, lock, created, claims, refresh_seconds = 600):
+        self.lock = lock
+        self.created = created # names of the segments created by any worker and not unlinked yet
+        self.claims = claims # segment name -> time a worker started fetching it, so the other workers wait instead of sending the same request
+        self.refresh_seconds = refresh_seconds
+        self.segments = {} # segment name -> SharedMemory opened by this process (the DataFrames read directly from them)
+        self.retired = [] # older versions of a season waiting to be closed once no DataFrame reads from them
+
+    # Function: generation()
+    # Purpose: Number the versions of a season's data (past seasons never change, the current season gets a new version every refresh_seconds)
+    # Precondition: A season ID must be provided
+    # Postcondition: Returns the version number of the season's data
+    def generation(self, season_id):
+        if season_id == current_season_id():
+            return int(time.time() // self.refresh_seconds)
+        return 0
+
+    # Function: segment_name()
+    # Purpose: Build the name of the shared memory segment of a season
+    # Precondition: A season ID, season type, and version number must be provided
+    # Postcondition: Returns the segment name (e.g., 'nba_2024-25_po_0')
+    def segment_name(self, season_id, season_type, generation):
+        type_code = 'rs' if season_type == 'Regular Season' else 'po'
+        return f"nba_{season_id}_{type_code}_{generation}"
+
+    # Function: load()
+    # Purpose: Read a season that another worker already saved in shared memory
+    # Precondition: A season ID and season type must be provided
+    # Postcondition: Returns the season's stats DataFrame, or None if no worker has saved it yet
+    def load(self, season_id, season_type):
+        name = self.segment_name(season_id, season_type, self.generation(season_id))
+
+        # the lock makes sure the segment is not read while a worker is still writing it
+        with self.lock:
+            try:
+                segment = self.open_segment(name)
+            except FileNotFoundError:
+                return None
+
+        return self.read_segment(segment)
+
+    # Function: claim()
+    # Purpose: Mark a season as being fetched by this worker
+    # Precondition: A season ID and season type must be provided
+    # Postcondition: Returns True if this worker should fetch the season, False if another worker is already fetching it
+    def claim(self, season_id, season_type):
+        name = self.segment_name(season_id, season_type, self.generation(season_id))
+
+        with self.lock:
+            claimed_at = self.claims.get(name)
+            if claimed_at is not None and time.time() - claimed_at < CLAIM_SECONDS:
+                return False
+
+            self.claims[name] = time.time()
+            return True
+
+    # Function: release_claim()
+    # Purpose: Let the other workers know this worker is done fetching a season (saved or failed)
+    # Precondition: A season ID and season type claimed with claim() must be provided
+    # Postcondition: The claim is removed
+    def release_claim(self, season_id, season_type):
+        name = self.segment_name(season_id, season_type, self.generation(season_id))
+
+        with self.lock:
+            self.claims.pop(name, None)
+
+    # Function: wait_for()
+    # Purpose: Wait for the worker that claimed a season to save it
+    # Precondition: A season ID and season type claimed by another worker must be provided
+    # Postcondition: Returns the season's stats DataFrame, or None if the other worker failed to fetch it
+    def wait_for(self, season_id, season_type, poll_seconds = 0.1):
+        name = self.segment_name(season_id, season_type, self.generation(season_id))
+
+        while True:
+            stats_df = self.load(season_id, season_type)
+            if stats_df is not None:
+                return stats_df
+
+            with self.lock:
+                claimed_at = self.claims.get(name)
+
+            # the claim is gone (or too old): the season was saved just now or the other worker failed
+            if claimed_at is None or time.time() - claimed_at >= CLAIM_SECONDS:
+                return self.load(season_id, season_type)
+
+            time.sleep(poll_seconds)
+
+    # Function: save()
+    # Purpose: Write a season fetched by this worker into shared memory for the other workers
+    # Precondition: A season ID, season type, and the stats DataFrame (PLAYER_NAME and NUMBER_COLUMNS) must be provided
+    # Postcondition: Returns the season's stats DataFrame read from shared memory (another worker's copy if it saved the season first)
+    def save(self, season_id, season_type, stats_df):
+        generation = self.generation(season_id)
+        name = self.segment_name(season_id, season_type, generation)
+
+        rows = len(stats_df)
+        names_bytes = '\n'.join(stats_df['PLAYER_NAME']).encode()
+        size = HEADER.size + rows * 8 * len(NUMBER_COLUMNS) + len(names_bytes)
+
+        with self.lock:
+            try:
+                segment = SharedMemory(name = name, create = True, size = size)
+            except FileExistsError:
+                # another worker saved the season first, use its copy
+                segment = self.open_segment(name)
+                return self.read_segment(segment)
+
+            self.keep_segment(name, segment)
+            self.created.append(name)
+
+            HEADER.pack_into(segment.buf, 0, rows, len(names_bytes))
+
+            # write each number column one after the other
+            for i, column in enumerate(NUMBER_COLUMNS):
+                dtype = np.int64 if column in INTEGER_COLUMNS else np.float64
+                values = np.ndarray((rows,), dtype = dtype, buffer = segment.buf, offset = HEADER.size + i * rows * 8)
+                values[:] = stats_df[column].to_numpy(dtype = dtype)
+
+            names_offset = HEADER.size + rows * 8 * len(NUMBER_COLUMNS)
+            segment.buf[names_offset:names_offset + len(names_bytes)] = names_bytes
+
+            # remove the names of the older versions of the current season (their memory is freed once every worker has closed them)
+            prefix = name.rsplit('_', 1)[0]
+            for old_name in list(self.created):
+                if old_name != name and old_name.rsplit('_', 1)[0] == prefix:
+                    self.unlink(old_name)
+
+        return self.read_segment(segment)
+
+    # Function: open_segment()
+    # Purpose: Open a segment saved by a worker, reusing it if this process already has it open
+    # Precondition: A segment name must be provided; raises FileNotFoundError if no worker has saved it
+    # Postcondition: Returns the open SharedMemory segment
+    def open_segment(self, name):
+        segment = self.segments.get(name)
+        if segment is None:
+            segment = SharedMemory(name = name)
+            self.keep_segment(name, segment)
+        return segment
+
+    # Function: keep_segment()
+    # Purpose: Keep a newly opened segment and retire the older versions of the same season that this process has open
+    # Precondition: The segment name and the open SharedMemory segment must be provided
+    # Postcondition: The segment is kept open; the older versions are closed by close_retired() once no DataFrame reads from them
+    def keep_segment(self, name, segment):
+        prefix = name.rsplit('_', 1)[0]
+
+        for old_name in list(self.segments):
+            if old_name.rsplit('_', 1)[0] == prefix:
+                self.retired.append(self.segments.pop(old_name))
+
+        self.segments[name] = segment
+
+    # Function: close_retired()
+    # Purpose: Close the older versions of the seasons so their memory is freed once they are unlinked
+    # Precondition: None
+    # Postcondition: Closes the retired segments no DataFrame reads from anymore, the others are tried again on the next call
+    def close_retired(self):
+        with self.lock:
+            still_used = []
+
+            for segment in self.retired:
+                try:
+                    segment.close()
+                except BufferError:
+                    still_used.append(segment) # a DataFrame (e.g., the career index) still reads from it
+
+            self.retired = still_used
+
+    # Function: read_segment()
+    # Purpose: Build a DataFrame whose number columns read directly from a shared memory segment
+    # Precondition: An open SharedMemory segment written by save() must be provided
+    # Postcondition: Returns the season's stats DataFrame (the number columns are read only views that keep the segment from being closed, only the names are copied)
+    def read_segment(self, segment):
+        rows, names_length = HEADER.unpack_from(segment.buf, 0)
+        names_offset = HEADER.size + rows * 8 * len(NUMBER_COLUMNS)
+        player_names = bytes(segment.buf[names_offset:names_offset + names_length]).decode().split('\n') if rows else []
+
+        columns = {'PLAYER_ID': None, 'PLAYER_NAME': player_names} # same column order as the fetched season
+        for i, column in enumerate(NUMBER_COLUMNS):
+            dtype = np.int64 if column in INTEGER_COLUMNS else np.float64
+            start = HEADER.size + i * rows * 8
+
+            # a slice of the buffer stays exported while the array uses it, so close() raises BufferError instead of unmapping memory in use
+            values = np.frombuffer(segment.buf[start:start + rows * 8], dtype = dtype)
+            values.flags.writeable = False
+            columns[column] = values
+
+        return pd.DataFrame(columns, copy = False)
+
+    # Function: unlink()
+    # Purpose: Remove the name of a shared memory segment so it is freed once every process that opened it exits
+    # Precondition: A segment name must be provided
+    # Postcondition: The segment name is removed if it exists and is no longer listed as created
+    def unlink(self, name):
+        if name in self.created:
+            self.created.remove(name)
+
+        try:
+            segment = SharedMemory(name = name)
+        except FileNotFoundError:
+            return
+
+        segment.unlink()
+        segment.close()
+
+    # Function: unlink_all()
+    # Purpose: Remove every season segment when the server stops
+    # Precondition: The workers must have exited
+    # Postcondition: The shared memory of all the seasons created by the workers is freed
+    def unlink_all(self):
+        for name in list(self.created):
+            self.unlink(name)